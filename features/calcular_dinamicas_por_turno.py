@@ -7,14 +7,11 @@ import numpy as np
 # =========================
 # 1. Asegurar columnas de turno y fecha
 # =========================
-def _asignar_turno(ts: pd.Timestamp) -> str:
-    h = ts.hour
-    if 0 <= h < 8:
-        return "T1_00_08"
-    elif 8 <= h < 16:
-        return "T2_08_16"
-    else:
-        return "T3_16_00"
+def _asignar_turno_serie(ts: pd.Series) -> pd.Series:
+    # T1_00_08: 00-08h, T2_08_16: 08-16h, T3_16_00: 16-24h
+    h = ts.dt.hour
+    turnos = np.select([h < 8, h < 16], ["T1_00_08", "T2_08_16"], default="T3_16_00")
+    return pd.Series(turnos, index=ts.index)
 
 
 def _asegurar_turno_y_fecha(
@@ -27,11 +24,18 @@ def _asegurar_turno_y_fecha(
         - 'turno'
         - 'fecha'
     """
+    # Si ya está todo (caso habitual desde main) no hace falta copiar el dataframe
+    if (
+        {"turno", "fecha"}.issubset(df_long.columns)
+        and pd.api.types.is_datetime64_any_dtype(df_long["timestamp"])
+    ):
+        return df_long
+
     df = df_long.copy()
     df["timestamp"] = pd.to_datetime(df["timestamp"])
 
     if "turno" not in df.columns:
-        df["turno"] = df["timestamp"].apply(_asignar_turno)
+        df["turno"] = _asignar_turno_serie(df["timestamp"])
 
     if "fecha" not in df.columns:
         df["fecha"] = df["timestamp"].dt.date
@@ -50,29 +54,33 @@ def estimar_intervalo_min(
     """
     Estima el intervalo de muestreo (en minutos) a partir del primer tag.
     """
-    df = df_long.copy()
-    df[timestamp_col] = pd.to_datetime(df[timestamp_col])
-
-    primer_tag = df[tag_col].iloc[0]
-    sub = df[df[tag_col] == primer_tag].sort_values(timestamp_col)
-
-    deltas = sub[timestamp_col].diff().dropna().dt.total_seconds() / 60.0
+    # Solo hace falta el timestamp del primer tag: no copiamos el dataframe entero
+    primer_tag = df_long[tag_col].iloc[0]
+    ts = pd.to_datetime(
+        df_long.loc[df_long[tag_col] == primer_tag, timestamp_col]
+    ).to_numpy(dtype="datetime64[ns]")
+
+    # Diferencias sobre el array ordenado (NaT queda al final y da NaN), con una
+    # máscara en lugar de Series.diff().dropna() y sus copias intermedias
+    deltas = np.diff(np.sort(ts)) / np.timedelta64(1, "m")
+    deltas = deltas[~np.isnan(deltas)]
     if len(deltas) == 0:
         return 10.0  # fallback
 
-    dt_min = deltas.median()
+    dt_min = np.median(deltas)
     return float(dt_min)
 
 
 # =========================
-# 3. Función auxiliar: dinámica dentro de un turno
+# 3. Función auxiliar: dinámica de todos los turnos a la vez
 # =========================
-def _stats_dinamica_turno(
-    sub: pd.DataFrame,
+def _stats_dinamica_grupos(
+    df: pd.DataFrame,
+    claves: list[str],
     col_valor: str,
-) -> pd.Series:
+) -> pd.DataFrame:
     """
-    Calcula:
+    Calcula, para cada grupo de 'claves' (tag, fecha, turno):
         - cv_turno
         - slope_turno (pendiente regresión lineal valor ~ tiempo_min)
         - rate_mean_turno ((último - primero) / Δt)
@@ -80,67 +88,75 @@ def _stats_dinamica_turno(
         - osc_sign_changes_norm_turno
         - n_muestras_turno
         - duracion_turno_min
-    """
-    vals = sub[col_valor].astype(float).values
-    t = pd.to_datetime(sub["timestamp"])
-    # tiempo en minutos relativo al inicio del turno
-    t0 = t.iloc[0]
-    t_min = (t - t0).dt.total_seconds().values / 60.0
-
-    n = len(vals)
-    if n < 2:
-        # con una sola muestra no tiene sentido hablar de pendiente ni oscilaciones
-        return pd.Series({
-            "n_muestras_turno": n,
-            "duracion_turno_min": 0.0,
-            "cv_turno": np.nan,
-            "slope_turno": np.nan,
-            "rate_mean_turno": np.nan,
-            "osc_sign_changes_turno": 0,
-            "osc_sign_changes_norm_turno": 0.0,
-        })
-
-    mean = float(np.mean(vals))
-    std = float(np.std(vals, ddof=1))  # similar a pandas std()
-
-    cv_turno = std / mean if mean != 0 else np.nan
-
-    # Pendiente por regresión lineal simple
-    # y = a * t_min + b  -> slope = a
-    try:
-        slope, intercept = np.polyfit(t_min, vals, 1)
-    except np.linalg.LinAlgError:
-        slope = np.nan
-
-    # Tasa de cambio promedio: (último - primero) / Δt
-    dt_total_min = (t.iloc[-1] - t.iloc[0]).total_seconds() / 60.0
-    if dt_total_min == 0:
-        rate_mean = np.nan
-    else:
-        rate_mean = (vals[-1] - vals[0]) / dt_total_min
 
-    # Oscilación: cambios de signo en la derivada
-    diffs = np.diff(vals)
-    signs = np.sign(diffs)  # -1, 0, +1
+    Requiere df ordenado de forma que las filas de cada grupo sean contiguas y
+    estén en orden temporal. En lugar de un polyfit por grupo, todas las sumas
+    se hacen con np.add.reduceat sobre los arrays completos (mínimos cuadrados
+    en forma cerrada). Como np.mean/np.std, un NaN en el grupo da NaN.
+    """
+    vals = df[col_valor].to_numpy(dtype=float)
+    n_filas = len(vals)
+
+    # Inicio de cada grupo (las filas de un grupo son contiguas)
+    codigos = df.groupby(claves, sort=False, observed=True).ngroup().to_numpy()
+    inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+    finales = np.r_[inicios[1:], n_filas] - 1
+    n = finales - inicios + 1
+
+    # tiempo en minutos relativo al inicio de cada turno; timestamp ya es
+    # datetime64 (_asegurar_turno_y_fecha), así que se opera sobre el array
+    # sin volver a pasar la columna por pd.to_datetime
+    ts = df["timestamp"].to_numpy(dtype="datetime64[ns]")
+    t_min = (ts - np.repeat(ts[inicios], n)) / np.timedelta64(1, "m")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.add.reduceat(vals, inicios) / n
+        desv = vals - np.repeat(mean, n)
+        std = np.sqrt(np.add.reduceat(desv ** 2, inicios) / (n - 1))  # similar a pandas std()
+        cv_turno = np.where(mean != 0, std / mean, np.nan)
+
+        # Pendiente por regresión lineal simple (y = a * t_min + b -> slope = a)
+        t_centrado = t_min - np.repeat(np.add.reduceat(t_min, inicios) / n, n)
+        num = np.add.reduceat(t_centrado * desv, inicios)
+        den = np.add.reduceat(t_centrado ** 2, inicios)
+        slope = np.where(den != 0, num / den, np.nan)
+
+        # Tasa de cambio promedio: (último - primero) / Δt
+        dt_total_min = t_min[finales]
+        rate_mean = np.where(dt_total_min != 0, (vals[finales] - vals[inicios]) / dt_total_min, np.nan)
+
+    # Oscilación: cambios de signo en la derivada, dentro de cada grupo
+    mismo_grupo = codigos[1:] == codigos[:-1]
+    signs = np.sign(np.diff(vals))  # -1, 0, +1
     # ignorar ceros para contar cambios de signo realmente
-    signs_nonzero = signs[signs != 0]
+    nonzero = mismo_grupo & (signs != 0)
+    signs_nonzero = signs[nonzero]
+    grupo_nonzero = codigos[1:][nonzero]
+
+    n_grupos = len(inicios)
+    n_nonzero = np.bincount(grupo_nonzero, minlength=n_grupos)
+    cambio = (grupo_nonzero[1:] == grupo_nonzero[:-1]) & (signs_nonzero[1:] != signs_nonzero[:-1])
+    osc_changes = np.bincount(grupo_nonzero[1:][cambio], minlength=n_grupos)
+    osc_changes_norm = np.where(
+        n_nonzero >= 2, osc_changes / np.maximum(n_nonzero - 1, 1), 0.0
+    )
 
-    if len(signs_nonzero) < 2:
-        osc_changes = 0
-        osc_changes_norm = 0.0
-    else:
-        osc_changes = int(np.sum(np.diff(signs_nonzero) != 0))
-        osc_changes_norm = osc_changes / max(len(signs_nonzero) - 1, 1)
+    # con una sola muestra no tiene sentido hablar de pendiente ni oscilaciones
+    una_muestra = n < 2
+    cv_turno[una_muestra] = np.nan
+    slope[una_muestra] = np.nan
+    rate_mean[una_muestra] = np.nan
 
-    return pd.Series({
-        "n_muestras_turno": n,
-        "duracion_turno_min": dt_total_min,
-        "cv_turno": cv_turno,
-        "slope_turno": slope,
-        "rate_mean_turno": rate_mean,
-        "osc_sign_changes_turno": osc_changes,
-        "osc_sign_changes_norm_turno": osc_changes_norm,
-    })
+    df_stats = df.iloc[inicios][claves].reset_index(drop=True)
+    df_stats["n_muestras_turno"] = n
+    df_stats["duracion_turno_min"] = dt_total_min
+    df_stats["cv_turno"] = cv_turno
+    df_stats["slope_turno"] = slope
+    df_stats["rate_mean_turno"] = rate_mean
+    df_stats["osc_sign_changes_turno"] = osc_changes
+    df_stats["osc_sign_changes_norm_turno"] = osc_changes_norm
+
+    return df_stats
 
 
 # =========================
@@ -162,15 +178,24 @@ def calcular_dinamica_por_turno(
         - osc_sign_changes_turno
         - osc_sign_changes_norm_turno
     """
-    df = _asegurar_turno_y_fecha(df_long, tag_col=tag_col)
-    df = df.sort_values([tag_col, "fecha", "turno", "timestamp"])
+    claves = [tag_col, "fecha", "turno"]
 
-    df_dinamica = (
-        df
-        .groupby([tag_col, "fecha", "turno"])
-        .apply(lambda sub: _stats_dinamica_turno(sub, col_valor=col_valor))
-        .reset_index()
-    )
+    df = _asegurar_turno_y_fecha(df_long, tag_col=tag_col)
+    # Filas sin clave quedan fuera, igual que en un groupby
+    df = df.dropna(subset=claves)
+    # fecha y turno salen del timestamp, así que ordenar por (tag, timestamp)
+    # ya deja cada (tag, fecha, turno) contiguo y en el mismo orden: no hace
+    # falta ordenar también por las columnas fecha (objetos date) y turno
+    df = df.sort_values([tag_col, "timestamp"])
+
+    if df.empty:
+        columnas = claves + [
+            "n_muestras_turno", "duracion_turno_min", "cv_turno", "slope_turno",
+            "rate_mean_turno", "osc_sign_changes_turno", "osc_sign_changes_norm_turno",
+        ]
+        df_dinamica = pd.DataFrame(columns=columnas)
+    else:
+        df_dinamica = _stats_dinamica_grupos(df, claves, col_valor=col_valor)
 
     if verbose:
         print("\nEjemplo de métricas de dinámica por turno:")
@@ -1,5 +1,9 @@
 # preprocesamiento.py
 
+import json
+from datetime import datetime
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 
@@ -7,21 +11,135 @@ import numpy as np
 # =========================
 # 1. Cargar archivo y validar estructura
 # =========================
+def _ruta_cache(ruta: str) -> Path:
+    """
+    Ruta del cache Parquet asociado al Excel (mismo nombre, extensión .parquet).
+    """
+    return Path(ruta).with_suffix(".parquet")
+
+
+# Claves de los metadatos del Parquet: firma del Excel de origen y posiciones
+# de las columnas cuyo nombre era una fecha
+_CLAVE_META_CACHE = b"ypf_origen_excel"
+_CLAVE_META_FECHAS = b"ypf_columnas_fecha"
+
+
+def _firma_excel(ruta: str) -> str:
+    """
+    Firma del Excel de origen: (st_mtime_ns, st_size) serializado como texto.
+    """
+    st = Path(ruta).stat()
+    return json.dumps([st.st_mtime_ns, st.st_size])
+
+
+def _leer_cache(ruta: str, verbose: bool = True) -> pd.DataFrame | None:
+    """
+    Devuelve el df_raw guardado en el cache Parquet si existe y se generó a
+    partir de este mismo Excel (mismo mtime_ns y tamaño); si no (o si falla
+    la lectura), devuelve None.
+    """
+    cache = _ruta_cache(ruta)
+    if not cache.exists():
+        return None
+
+    try:
+        import pyarrow.parquet as pq
+        tabla = pq.read_table(cache)
+    except Exception as e:  # pyarrow no instalado, archivo corrupto, etc.
+        if verbose:
+            print(f"No se pudo leer el cache {cache}: {e}")
+        return None
+
+    # Comparación exacta: un Excel reemplazado conservando una fecha antigua
+    # (cp -p, robocopy...) cambia igualmente de firma y no usa el cache viejo
+    metadatos = tabla.schema.metadata or {}
+    firma = metadatos.get(_CLAVE_META_CACHE, b"").decode()
+    if firma != _firma_excel(ruta):
+        if verbose:
+            print(f"Cache desactualizado, se ignora: {cache}")
+        return None
+
+    df_raw = tabla.to_pandas()
+
+    # Los nombres de las columnas de tiempo se guardaron como texto: se
+    # recuperan como Timestamp para devolver el mismo df_raw que read_excel
+    pos_fechas = set(json.loads(metadatos.get(_CLAVE_META_FECHAS, b"[]")))
+    df_raw.columns = [
+        pd.to_datetime(c) if i in pos_fechas else c
+        for i, c in enumerate(df_raw.columns)
+    ]
+
+    if verbose:
+        print(f"Datos cargados desde cache: {cache}")
+    return df_raw
+
+
+def _guardar_cache(df_raw: pd.DataFrame, ruta: str, verbose: bool = True):
+    """
+    Guarda df_raw en Parquet junto al Excel para no volver a parsearlo, con
+    la firma del Excel en los metadatos del archivo.
+    Si no se puede (sin pyarrow, celdas con tipos mezclados...) solo avisa.
+    """
+    cache = _ruta_cache(ruta)
+
+    # Solo se restauran nombres texto o fecha; con otros (ej. números) el
+    # cache devolvería etiquetas distintas a read_excel, así que no se guarda
+    if not all(isinstance(c, (str, datetime, np.datetime64)) for c in df_raw.columns):
+        if verbose:
+            print(f"No se guarda el cache {cache}: hay nombres de columna no soportados")
+        return
+
+    # Parquet exige nombres de columna string: se guardan como texto y se
+    # anota cuáles eran fechas para restaurarlas al leer el cache
+    df_cache = df_raw.copy(deep=False)
+    df_cache.columns = df_cache.columns.map(str)
+    pos_fechas = [
+        i for i, c in enumerate(df_raw.columns)
+        if isinstance(c, (datetime, np.datetime64))
+    ]
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tabla = pa.Table.from_pandas(df_cache, preserve_index=False)
+        metadatos = dict(tabla.schema.metadata or {})
+        metadatos[_CLAVE_META_CACHE] = _firma_excel(ruta).encode()
+        metadatos[_CLAVE_META_FECHAS] = json.dumps(pos_fechas).encode()
+        pq.write_table(tabla.replace_schema_metadata(metadatos), cache)
+    except Exception as e:
+        if verbose:
+            print(f"No se pudo guardar el cache {cache}: {e}")
+
+
 def cargar_datos_proceso(
     ruta: str,
     tag_col: str = "Tag de PI",
+    usar_cache: bool = True,
     verbose: bool = True
 ) -> pd.DataFrame:
     """
     Carga el archivo Excel de datos de proceso en formato wide.
     Retorna df_raw.
+
+    Si usar_cache=True, la primera lectura se guarda en un Parquet junto al
+    Excel y las siguientes ejecuciones lo leen directamente (read_excel es,
+    con diferencia, el paso más lento). El cache solo se usa si la fecha de
+    modificación (en ns) y el tamaño del Excel coinciden exactamente con los
+    del Excel a partir del cual se generó.
     """
-    df_raw = pd.read_excel(ruta)
+    df_raw = _leer_cache(ruta, verbose=verbose) if usar_cache else None
+
+    if df_raw is None:
+        df_raw = pd.read_excel(ruta)
+        if usar_cache:
+            _guardar_cache(df_raw, ruta, verbose=verbose)
 
     if verbose:
         print("Shape original (filas, columnas):", df_raw.shape)
         print(df_raw.head())
-        print(df_raw.info())
+        # info() ya imprime por sí mismo (envolverlo en print añadía un "None")
+        df_raw.info()
 
     assert tag_col in df_raw.columns, f"No encuentro la columna de tags '{tag_col}', revisa el nombre."
 
@@ -52,26 +170,41 @@ def wide_a_long(
 
     # Convertimos los nombres de las columnas de tiempo a datetime
     time_cols_dt = pd.to_datetime(time_cols)
-    rename_map = dict(zip(time_cols, time_cols_dt))
-    df = df_raw.rename(columns=rename_map)
 
     if verbose:
-        print("Tipo de las columnas de tiempo:", type(list(df.columns[1:5])[0]))
-
-    # Melt: wide -> long
-    df_long = df.melt(
-        id_vars=tag_col,
-        var_name="timestamp",
-        value_name="value"
+        print("Tipo de las columnas de tiempo:", type(time_cols_dt[0]))
+
+    # Wide -> long directamente con numpy (mismo orden de filas que df.melt:
+    # por cada timestamp, todos los tags). La matriz de valores se aplana en
+    # orden de columnas sin pasar por las copias intermedias de melt.
+    n_tags = df_raw.shape[0]
+    valores = df_raw.loc[:, df_raw.columns != tag_col].to_numpy()
+
+    # El tag se guarda como categórico: cada nombre se repite una vez por
+    # timestamp, así que en lugar de N×T strings guardamos códigos enteros
+    # (menos memoria y groupby/merge por tag más rápidos)
+    codigos_tag, nombres_tag = pd.factorize(df_raw[tag_col], sort=True)
+    tags_long = pd.Categorical.from_codes(
+        np.tile(codigos_tag, len(time_cols)), categories=nombres_tag
     )
 
-    # Asegurar que timestamp es datetime
-    df_long["timestamp"] = pd.to_datetime(df_long["timestamp"])
+    df_long = pd.DataFrame({
+        tag_col: tags_long,
+        "timestamp": time_cols_dt.repeat(n_tags),
+        "value": valores.ravel(order="F"),
+    })
+
+    # Si alguna celda trae texto (ej. "Bad", "I/O Timeout" en exports de PI) la
+    # columna queda como object: la pasamos a numérica y esos textos quedan como NaN
+    if not pd.api.types.is_numeric_dtype(df_long["value"]):
+        df_long["value"] = pd.to_numeric(df_long["value"], errors="coerce")
 
     if verbose:
         print("Shape long:", df_long.shape)
         print(df_long.head())
-        print(df_long.info())
+        # show_counts=False: evita contar no-nulos columna a columna sobre
+        # todo el df_long solo para mostrarlo (los nulos ya se diagnostican aparte)
+        df_long.info(show_counts=False)
 
     return df_long
 
@@ -88,16 +221,19 @@ def diagnostico_nulos(
     Imprime diagnóstico de nulos globales, por tag y por timestamp.
     No modifica el dataframe.
     """
-    total_nulos = df_long["value"].isna().sum()
+    # Máscara de nulos calculada una sola vez y reutilizada en todos los conteos
+    es_nulo = df_long["value"].isna()
+    total_nulos = es_nulo.sum()
     pct_nulos = total_nulos / len(df_long) * 100
 
     if verbose:
         print(f"Nulos totales: {total_nulos} ({pct_nulos:.4f} %)")
 
         missing_by_tag = (
-            df_long
-            .groupby(tag_col)["value"]
-            .apply(lambda s: s.isna().mean() * 100)
+            es_nulo
+            .groupby(df_long[tag_col], observed=True)
+            .mean()
+            .mul(100)
             .sort_values(ascending=False)
         )
 
@@ -105,9 +241,10 @@ def diagnostico_nulos(
         print(missing_by_tag.head(10))
 
         missing_by_time = (
-            df_long
-            .groupby("timestamp")["value"]
-            .apply(lambda s: s.isna().mean() * 100)
+            es_nulo
+            .groupby(df_long["timestamp"])
+            .mean()
+            .mul(100)
             .sort_values(ascending=False)
         )
 
@@ -130,7 +267,7 @@ def diagnostico_variabilidad(
     """
     std_by_tag = (
         df_long
-        .groupby(tag_col)["value"]
+        .groupby(tag_col, observed=True)["value"]
         .std()
         .sort_values()
     )
@@ -178,21 +315,27 @@ def agregar_outliers_iqr(
     Agrega una columna booleana 'is_outlier_iqr' (por defecto) al df_long
     marcando outliers por tag usando IQR.
     """
-    df = df_long.sort_values([tag_col, "timestamp"]).copy()
-
-    df[col_salida] = (
-        df
-        .groupby(tag_col)[col_valor]
-        .transform(marcar_outliers_iqr_serie)
-    )
+    df = df_long.sort_values([tag_col, "timestamp"])
+
+    # Mismo criterio que marcar_outliers_iqr_serie (definición de referencia,
+    # por serie), pero con los cuartiles de todos los tags calculados en una
+    # sola pasada agrupada
+    vals = df[col_valor].astype(float)
+    grupos = vals.groupby(df[tag_col], observed=True)
+    q1 = grupos.transform("quantile", 0.25)
+    q3 = grupos.transform("quantile", 0.75)
+    iqr = q3 - q1
+    fuera = (vals < q1 - 1.5 * iqr) | (vals > q3 + 1.5 * iqr)
+    df[col_salida] = fuera & (iqr != 0)  # para señales constantes no hay outliers
 
     if verbose:
         pct_outliers = df[col_salida].mean() * 100
         print("\nPorcentaje de puntos marcados como outlier (IQR):")
         print(f"{pct_outliers:.4f} %")
 
+        # Solo se materializan las 20 filas que se muestran, no todos los outliers
         print("\nEjemplos de puntos outlier:")
-        print(df[df[col_salida]].head(20))
+        print(df.iloc[np.flatnonzero(df[col_salida].to_numpy())[:20]])
 
     return df
 
@@ -210,14 +353,27 @@ def interpolar_nulos_por_tag(
     """
     Interpola nulos en 'col_valor' por tag a lo largo del tiempo.
     Crea una nueva columna con el nombre 'nueva_col'.
+
+    Equivale a s.interpolate(limit_direction="both") por tag (lineal por
+    posición; los extremos toman el valor válido más cercano), pero se
+    resuelve con ffill/bfill agrupados en lugar de una llamada Python por tag.
     """
-    df = df_long.sort_values([tag_col, "timestamp"]).copy()
+    df = df_long.sort_values([tag_col, "timestamp"])
 
-    df[nueva_col] = (
-        df
-        .groupby(tag_col)[col_valor]
-        .transform(lambda s: s.interpolate(limit_direction="both"))
-    )
+    valores = df[col_valor].astype(float)
+    pos = pd.Series(np.arange(len(df), dtype=float), index=df.index)
+
+    # Valor válido anterior / siguiente (y su posición) dentro de cada tag
+    grupos_val = valores.groupby(df[tag_col], sort=False, observed=True)
+    grupos_pos = pos.where(valores.notna()).groupby(df[tag_col], sort=False, observed=True)
+    val_ant, val_sig = grupos_val.ffill(), grupos_val.bfill()
+    pos_ant, pos_sig = grupos_pos.ffill(), grupos_pos.bfill()
+
+    pendiente = (val_sig - val_ant) / (pos_sig - pos_ant)
+    relleno = (pendiente * (pos - pos_ant) + val_ant).fillna(val_ant).fillna(val_sig)
+
+    # Las filas sin tag quedan fuera de todos los grupos, igual que en groupby().transform
+    df[nueva_col] = valores.fillna(relleno).where(df[tag_col].notna())
 
     if verbose:
         nulos_despues = df[nueva_col].isna().sum()
@@ -233,11 +389,12 @@ def preprocesar_datos_proceso(
     ruta: str,
     tag_col: str = "Tag de PI",
     usar_interpolacion: bool = True,
+    usar_cache: bool = True,
     verbose: bool = True
 ) -> pd.DataFrame:
     """
     Orquesta todo el preprocesamiento:
-        1) Carga df_raw (wide)
+        1) Carga df_raw (wide, desde el cache Parquet si está al día)
         2) Convierte a df_long
         3) Diagnóstico de nulos
         4) Diagnóstico de variabilidad
@@ -253,7 +410,7 @@ def preprocesar_datos_proceso(
         - 'value_interp' (si usar_interpolacion=True)
     """
     # 1) Cargar
-    df_raw = cargar_datos_proceso(ruta, tag_col=tag_col, verbose=verbose)
+    df_raw = cargar_datos_proceso(ruta, tag_col=tag_col, usar_cache=usar_cache, verbose=verbose)
 
     # 2) Wide -> Long
     df_long = wide_a_long(df_raw, tag_col=tag_col, verbose=verbose)
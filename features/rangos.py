@@ -24,15 +24,12 @@ def construir_rangos_desde_historico(
         - lim_inf
         - lim_sup
     """
-    df_rangos = (
-        df_long
-        .groupby(tag_col)[col_valor]
-        .agg(
-            lim_inf=lambda s: s.quantile(p_low),
-            lim_sup=lambda s: s.quantile(p_high),
-        )
-        .reset_index()
-    )
+    # quantile agrupado: una pasada para todos los tags, sin lambdas por grupo
+    grupos = df_long.groupby(tag_col, observed=True)[col_valor]
+    df_rangos = pd.DataFrame({
+        "lim_inf": grupos.quantile(p_low),
+        "lim_sup": grupos.quantile(p_high),
+    }).reset_index()
 
     if verbose:
         print("\nEjemplo de rangos por tag (primeros 10):")
@@ -44,14 +41,11 @@ def construir_rangos_desde_historico(
 # =========================
 # 2. Asignar turno (duplicamos lógica para ser independientes)
 # =========================
-def _asignar_turno(ts: pd.Timestamp) -> str:
-    h = ts.hour
-    if 0 <= h < 8:
-        return "T1_00_08"
-    elif 8 <= h < 16:
-        return "T2_08_16"
-    else:
-        return "T3_16_00"
+def _asignar_turno_serie(ts: pd.Series) -> pd.Series:
+    # T1_00_08: 00-08h, T2_08_16: 08-16h, T3_16_00: 16-24h
+    h = ts.dt.hour
+    turnos = np.select([h < 8, h < 16], ["T1_00_08", "T2_08_16"], default="T3_16_00")
+    return pd.Series(turnos, index=ts.index)
 
 
 def _asegurar_turno_y_fecha(
@@ -62,11 +56,18 @@ def _asegurar_turno_y_fecha(
     Asegura que df_long tiene columnas 'turno' y 'fecha'.
     Si no están, las crea.
     """
+    # Si ya está todo (caso habitual desde main) no hace falta copiar el dataframe
+    if (
+        {"turno", "fecha"}.issubset(df_long.columns)
+        and pd.api.types.is_datetime64_any_dtype(df_long["timestamp"])
+    ):
+        return df_long
+
     df = df_long.copy()
     df["timestamp"] = pd.to_datetime(df["timestamp"])
 
     if "turno" not in df.columns:
-        df["turno"] = df["timestamp"].apply(_asignar_turno)
+        df["turno"] = _asignar_turno_serie(df["timestamp"])
 
     if "fecha" not in df.columns:
         df["fecha"] = df["timestamp"].dt.date
@@ -85,18 +86,21 @@ def estimar_intervalo_min(
     """
     Estima el intervalo de muestreo (en minutos) a partir del primer tag.
     """
-    df = df_long.copy()
-    df[timestamp_col] = pd.to_datetime(df[timestamp_col])
-
-    primer_tag = df[tag_col].iloc[0]
-    sub = df[df[tag_col] == primer_tag].sort_values(timestamp_col)
-
-    deltas = sub[timestamp_col].diff().dropna().dt.total_seconds() / 60.0
+    # Solo hace falta el timestamp del primer tag: no copiamos el dataframe entero
+    primer_tag = df_long[tag_col].iloc[0]
+    ts = pd.to_datetime(
+        df_long.loc[df_long[tag_col] == primer_tag, timestamp_col]
+    ).to_numpy(dtype="datetime64[ns]")
+
+    # Diferencias sobre el array ordenado (NaT queda al final y da NaN), con una
+    # máscara en lugar de Series.diff().dropna() y sus copias intermedias
+    deltas = np.diff(np.sort(ts)) / np.timedelta64(1, "m")
+    deltas = deltas[~np.isnan(deltas)]
     if len(deltas) == 0:
         # fallback
         return 10.0
 
-    dt_min = deltas.median()
+    dt_min = np.median(deltas)
     return float(dt_min)
 
 
@@ -142,54 +146,35 @@ def calcular_porcentajes_rango_por_turno(
         if verbose:
             print(f"\nPeriodo de muestreo estimado: {sample_period_min:.3f} minutos")
 
-    def _stats_rango_grupo(sub: pd.DataFrame) -> pd.Series:
-        vals = sub[col_valor]
-        lim_inf = sub["lim_inf"].iloc[0]
-        lim_sup = sub["lim_sup"].iloc[0]
-
-        n_total = len(vals)
-        if n_total == 0:
-            return pd.Series({
-                "n_muestras": 0,
-                "pct_en_rango": 0.0,
-                "pct_bajo": 0.0,
-                "pct_alto": 0.0,
-                "tiempo_en_rango_min": 0.0,
-                "tiempo_bajo_min": 0.0,
-                "tiempo_alto_min": 0.0,
-            })
-
-        mask_bajo = vals < lim_inf
-        mask_alto = vals > lim_sup
-        n_bajo = mask_bajo.sum()
-        n_alto = mask_alto.sum()
-        n_en_rango = n_total - n_bajo - n_alto
-
-        pct_bajo = n_bajo / n_total * 100.0
-        pct_alto = n_alto / n_total * 100.0
-        pct_en_rango = n_en_rango / n_total * 100.0
-
-        tiempo_bajo_min = n_bajo * sample_period_min
-        tiempo_alto_min = n_alto * sample_period_min
-        tiempo_en_rango_min = n_en_rango * sample_period_min
-
-        return pd.Series({
-            "n_muestras": n_total,
-            "pct_en_rango": pct_en_rango,
-            "pct_bajo": pct_bajo,
-            "pct_alto": pct_alto,
-            "tiempo_en_rango_min": tiempo_en_rango_min,
-            "tiempo_bajo_min": tiempo_bajo_min,
-            "tiempo_alto_min": tiempo_alto_min,
-        })
+    # Máscaras bajo/alto sobre los arrays completos; luego un solo conteo agrupado
+    # (los NaN no caen ni bajo ni alto, así que cuentan como en rango)
+    vals = df[col_valor].to_numpy(dtype=float)
+    df["_bajo"] = vals < df["lim_inf"].to_numpy(dtype=float)
+    df["_alto"] = vals > df["lim_sup"].to_numpy(dtype=float)
 
     df_pct = (
         df
-        .groupby([tag_col, "fecha", "turno"])
-        .apply(_stats_rango_grupo)
+        .groupby([tag_col, "fecha", "turno"], observed=True)
+        .agg(
+            n_muestras=(col_valor, "size"),
+            n_bajo=("_bajo", "sum"),
+            n_alto=("_alto", "sum"),
+        )
         .reset_index()
     )
 
+    n_total = df_pct["n_muestras"]
+    n_bajo = df_pct.pop("n_bajo")
+    n_alto = df_pct.pop("n_alto")
+    n_en_rango = n_total - n_bajo - n_alto
+
+    df_pct["pct_en_rango"] = n_en_rango / n_total * 100.0
+    df_pct["pct_bajo"] = n_bajo / n_total * 100.0
+    df_pct["pct_alto"] = n_alto / n_total * 100.0
+    df_pct["tiempo_en_rango_min"] = n_en_rango * sample_period_min
+    df_pct["tiempo_bajo_min"] = n_bajo * sample_period_min
+    df_pct["tiempo_alto_min"] = n_alto * sample_period_min
+
     if verbose:
         print("\nEjemplo de % en rango por turno:")
         print(df_pct.head())
@@ -1,11 +1,21 @@
 # llm/generate_per_variable.py
 
 import pandas as pd
+from functools import lru_cache
 from typing import Dict, Any
 from .model_gemma import GemmaClient
 
 
-def build_prompt_reporte(row: pd.Series) -> str:
+@lru_cache(maxsize=1)
+def obtener_cliente_llm() -> GemmaClient:
+    """
+    Devuelve el cliente del modelo. Se carga la primera vez que se pide y se
+    reutiliza en las siguientes llamadas (cargar el modelo es lo más caro).
+    """
+    return GemmaClient()
+
+
+def build_prompt_reporte(row: Dict[str, Any]) -> str:
     """
     Construye un prompt tipo 'reporte' usando la info de la fila.
     Ajusta los nombres de columna a los que tengas en tu CSV.
@@ -43,14 +53,21 @@ def generar_para_turno(
     fecha: str | None = None,
     turno: str | None = None,
     tags: Any = None,
+    batch_size: int = 8,
 ) -> pd.DataFrame:
     """
-    Lee el CSV de features, filtra por fecha/turno (si existen esas columnas),
-    y genera textos tipo reporte por cada fila.
+    Lee el CSV de features, filtra por fecha/turno/tags (si existen esas columnas),
+    y genera textos tipo reporte por cada fila. Los prompts se envían al modelo
+    en lotes de batch_size.
     """
 
     print(f"Leyendo features desde: {ruta_csv_features}")
-    df = pd.read_csv(ruta_csv_features)
+    # 'fecha' se lee como texto para poder filtrar con el string recibido.
+    # El motor pyarrow es bastante más rápido; si no está instalado usamos el de C.
+    try:
+        df = pd.read_csv(ruta_csv_features, engine="pyarrow", dtype={"fecha": str})
+    except ImportError:
+        df = pd.read_csv(ruta_csv_features, dtype={"fecha": str})
 
     # Filtrar por fecha y turno sólo si las columnas existen
     if fecha is not None and "fecha" in df.columns:
@@ -59,18 +76,32 @@ def generar_para_turno(
     if turno is not None and "turno" in df.columns:
         df = df[df["turno"] == turno]
 
+    # Filtrar por tags (uno o varios) con un isin vectorizado
+    if tags is not None and "Tag de PI" in df.columns:
+        if isinstance(tags, str):
+            tags = [tags]
+        df = df[df["Tag de PI"].isin(set(tags))]
+
     print(f"Filas después del filtrado: {len(df)}")
 
-    # Instanciar el modelo
-    llm = GemmaClient()
+    # Sin filas no hay nada que generar: salimos antes de cargar el modelo,
+    # que es con diferencia lo más caro (típico si la fecha/turno no existe)
+    if df.empty:
+        print("No hay filas para generar reportes; no se carga el modelo.")
+        return pd.DataFrame(columns=["fecha", "turno", "variable", "valor", "reporte_llm"])
+
+    # Modelo (cargado una sola vez por proceso)
+    llm = obtener_cliente_llm()
 
     resultados: list[Dict[str, Any]] = []
 
-    for _, row in df.iterrows():
-        prompt_reporte = build_prompt_reporte(row)
+    # to_dict("records") evita construir una pd.Series por fila como iterrows
+    filas = df.to_dict("records")
+    prompts = [build_prompt_reporte(row) for row in filas]
 
-        texto_reporte = llm.generate(prompt_reporte)
+    textos = llm.generate_batch(prompts, batch_size=batch_size)
 
+    for row, texto_reporte in zip(filas, textos):
         resultados.append(
             {
                 "fecha": row.get("fecha", fecha),
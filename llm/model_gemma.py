@@ -24,6 +24,8 @@ class GemmaClient:
 
         print(f"Cargando modelo {MODEL_NAME} en {self.device}...")
         self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        # Padding a la izquierda para poder generar en lotes (modelo decoder-only)
+        self.tokenizer.padding_side = "left"
         self.model = AutoModelForCausalLM.from_pretrained(
             MODEL_NAME,
             torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
@@ -36,6 +38,16 @@ class GemmaClient:
             tokenizer=self.tokenizer,
         )
 
+    @staticmethod
+    def _limpiar_salida(out: str, prompt: str) -> str:
+        """
+        En algunos modelos el prompt viene incluido en la salida: lo quitamos
+        asumiendo que el texto útil viene después del prompt.
+        """
+        if out.startswith(prompt):
+            return out[len(prompt):].strip()
+        return out
+
     def generate(self, prompt: str, **gen_kwargs) -> str:
         """
         Genera texto para un prompt dado.
@@ -48,9 +60,22 @@ class GemmaClient:
             **kwargs
         )[0]["generated_text"]
 
-        # En algunos modelos el prompt viene incluido en la salida: lo limpiamos si quieres.
-        # Aquí asumimos que el texto útil viene después del prompt, así que:
-        if out.startswith(prompt):
-            out = out[len(prompt):].strip()
+        return self._limpiar_salida(out, prompt)
 
-        return out
+    def generate_batch(self, prompts: list[str], batch_size: int = 8, **gen_kwargs) -> list[str]:
+        """
+        Genera texto para varios prompts, pasándolos al pipeline en lotes de
+        batch_size. Aprovecha mucho mejor la GPU que llamar a generate() uno a uno.
+        """
+        if not prompts:
+            return []
+
+        kwargs = GENERATION_CONFIG.copy()
+        kwargs.update(gen_kwargs)
+
+        salidas = self.pipe(prompts, batch_size=batch_size, **kwargs)
+
+        return [
+            self._limpiar_salida(salida[0]["generated_text"], prompt)
+            for prompt, salida in zip(prompts, salidas)
+        ]
@@ -4,119 +4,110 @@ import pandas as pd
 import numpy as np
 
 
-def _clasificar_tendencia_row(
-    row,
-    slope_col: str,
-    cv_col: str,
-    std_col: str | None,
+def _clasificar_tendencia(
+    slope: np.ndarray,
+    cv: np.ndarray,
+    std_turno: np.ndarray,
+    osc_norm: np.ndarray,
     umbral_slope_std_baja: float,
     umbral_slope_std_alta: float,
     umbral_cv_plano: float,
-    osc_norm_col: str,
     umbral_osc_para_oscilando: float,
-) -> str:
+) -> np.ndarray:
     """
-    Regla para tendencia_turno_cat.
+    Regla para tendencia_turno_cat, aplicada a todas las filas a la vez.
+    El orden de las condiciones en np.select define la prioridad de las reglas.
     """
-    slope = row[slope_col]
-    cv = row[cv_col]
-    osc_norm = row[osc_norm_col]
-    std_turno = row[std_col] if std_col is not None and std_col in row.index else np.nan
-
-    # Si no tenemos datos suficientes
-    if pd.isna(slope):
-        return "desconocida"
-
-    # Si está muy oscilante, priorizamos "oscilando"
-    if not pd.isna(osc_norm) and osc_norm >= umbral_osc_para_oscilando:
-        return "oscilando"
-
-    # Normalizamos la pendiente por la desviación estándar (si está disponible)
-    if not pd.isna(std_turno) and std_turno > 0:
-        slope_norm = slope / std_turno
-    else:
-        slope_norm = slope  # fallback: usamos slope sin normalizar
-
-    # Si la variación es casi nula, consideramos la señal plana
-    if not pd.isna(cv) and cv < umbral_cv_plano:
-        if abs(slope_norm) < umbral_slope_std_baja:
-            return "plana"
-        else:
-            # ligera tendencia pero casi sin variación
-            return "ligera_tendencia"
-
-    # Reglas principales de tendencia
-    if slope_norm >= umbral_slope_std_alta:
-        return "subiendo_fuerte"
-    elif slope_norm >= umbral_slope_std_baja:
-        return "subiendo"
-    elif slope_norm <= -umbral_slope_std_alta:
-        return "bajando_fuerte"
-    elif slope_norm <= -umbral_slope_std_baja:
-        return "bajando"
-    else:
-        return "estable"
-
-
-def _clasificar_oscilacion_row(
-    row,
-    osc_norm_col: str,
+    # Normalizamos la pendiente por la desviación estándar (si está disponible);
+    # si no, usamos slope sin normalizar
+    usar_std = ~np.isnan(std_turno) & (std_turno > 0)
+    slope_norm = np.divide(slope, std_turno, out=slope.copy(), where=usar_std)
+
+    # Señal casi plana: la variación es casi nula
+    plano = cv < umbral_cv_plano
+
+    condiciones = [
+        # Si no tenemos datos suficientes
+        np.isnan(slope),
+        # Si está muy oscilante, priorizamos "oscilando"
+        osc_norm >= umbral_osc_para_oscilando,
+        plano & (np.abs(slope_norm) < umbral_slope_std_baja),
+        # ligera tendencia pero casi sin variación
+        plano,
+        # Reglas principales de tendencia
+        slope_norm >= umbral_slope_std_alta,
+        slope_norm >= umbral_slope_std_baja,
+        slope_norm <= -umbral_slope_std_alta,
+        slope_norm <= -umbral_slope_std_baja,
+    ]
+    categorias = [
+        "desconocida",
+        "oscilando",
+        "plana",
+        "ligera_tendencia",
+        "subiendo_fuerte",
+        "subiendo",
+        "bajando_fuerte",
+        "bajando",
+    ]
+    return np.select(condiciones, categorias, default="estable")
+
+
+def _clasificar_oscilacion(
+    osc_norm: np.ndarray,
     umbral_baja: float,
     umbral_media: float,
     umbral_alta: float,
-) -> str:
+) -> np.ndarray:
     """
     Clasifica nivel de oscilación a partir de osc_sign_changes_norm_turno.
     """
-    osc_norm = row[osc_norm_col]
-
-    if pd.isna(osc_norm):
-        return "osc_desconocida"
-
-    if osc_norm < umbral_baja:
-        return "sin_oscilacion"
-    elif osc_norm < umbral_media:
-        return "oscilacion_baja"
-    elif osc_norm < umbral_alta:
-        return "oscilacion_media"
-    else:
-        return "oscilacion_alta"
-
-
-def _clasificar_estabilidad_global_row(
-    row,
-    cv_col: str,
-    osc_cat_col: str,
+    condiciones = [
+        np.isnan(osc_norm),
+        osc_norm < umbral_baja,
+        osc_norm < umbral_media,
+        osc_norm < umbral_alta,
+    ]
+    categorias = [
+        "osc_desconocida",
+        "sin_oscilacion",
+        "oscilacion_baja",
+        "oscilacion_media",
+    ]
+    return np.select(condiciones, categorias, default="oscilacion_alta")
+
+
+def _clasificar_estabilidad_global(
+    cv: np.ndarray,
+    osc_cat: np.ndarray,
     umbral_cv_bajo: float,
     umbral_cv_medio: float,
-) -> str:
+) -> np.ndarray:
     """
     Combina CV + nivel de oscilación para dar una etiqueta de estabilidad global.
     """
-    cv = row[cv_col]
-    osc_cat = row[osc_cat_col]
-
-    if pd.isna(cv):
-        return "estabilidad_desconocida"
-
     # Primero miramos cv
-    if cv < umbral_cv_bajo:
-        base = "muy_estable"
-    elif cv < umbral_cv_medio:
-        base = "estable"
-    else:
-        base = "variable"
+    base = np.select(
+        [cv < umbral_cv_bajo, cv < umbral_cv_medio],
+        ["muy_estable", "estable"],
+        default="variable",
+    )
 
     # Ajustamos según la oscilación
-    if osc_cat in ("oscilacion_media", "oscilacion_alta"):
-        if base == "muy_estable":
-            return "estable_oscilante"
-        elif base == "estable":
-            return "variable_oscilante"
-        else:
-            return "inestable"
-    else:
-        return base
+    oscilante = np.isin(osc_cat, ["oscilacion_media", "oscilacion_alta"])
+    condiciones = [
+        np.isnan(cv),
+        oscilante & (base == "muy_estable"),
+        oscilante & (base == "estable"),
+        oscilante,
+    ]
+    categorias = [
+        "estabilidad_desconocida",
+        "estable_oscilante",
+        "variable_oscilante",
+        "inestable",
+    ]
+    return np.select(condiciones, categorias, default=base)
 
 
 def clasificar_dinamica_turno(
@@ -156,44 +147,40 @@ def clasificar_dinamica_turno(
     """
     df = df_features.copy()
 
+    slope = df[col_slope].to_numpy(dtype=float)
+    cv = df[col_cv].to_numpy(dtype=float)
+    osc_norm = df[col_osc_norm].to_numpy(dtype=float)
+    if col_std is not None and col_std in df.columns:
+        std_turno = df[col_std].to_numpy(dtype=float)
+    else:
+        std_turno = np.full(len(df), np.nan)
+
     # 1) Clasificar oscilación
-    df["osc_turno_cat"] = df.apply(
-        lambda row: _clasificar_oscilacion_row(
-            row,
-            osc_norm_col=col_osc_norm,
-            umbral_baja=umbral_osc_baja,
-            umbral_media=umbral_osc_media,
-            umbral_alta=umbral_osc_alta,
-        ),
-        axis=1,
+    df["osc_turno_cat"] = _clasificar_oscilacion(
+        osc_norm,
+        umbral_baja=umbral_osc_baja,
+        umbral_media=umbral_osc_media,
+        umbral_alta=umbral_osc_alta,
     )
 
     # 2) Clasificar tendencia
-    df["tendencia_turno_cat"] = df.apply(
-        lambda row: _clasificar_tendencia_row(
-            row,
-            slope_col=col_slope,
-            cv_col=col_cv,
-            std_col=col_std,
-            umbral_slope_std_baja=umbral_slope_std_baja,
-            umbral_slope_std_alta=umbral_slope_std_alta,
-            umbral_cv_plano=umbral_cv_plano,
-            osc_norm_col=col_osc_norm,
-            umbral_osc_para_oscilando=umbral_osc_para_oscilando,
-        ),
-        axis=1,
+    df["tendencia_turno_cat"] = _clasificar_tendencia(
+        slope,
+        cv,
+        std_turno,
+        osc_norm,
+        umbral_slope_std_baja=umbral_slope_std_baja,
+        umbral_slope_std_alta=umbral_slope_std_alta,
+        umbral_cv_plano=umbral_cv_plano,
+        umbral_osc_para_oscilando=umbral_osc_para_oscilando,
     )
 
     # 3) Clasificar estabilidad global
-    df["estabilidad_turno_cat"] = df.apply(
-        lambda row: _clasificar_estabilidad_global_row(
-            row,
-            cv_col=col_cv,
-            osc_cat_col="osc_turno_cat",
-            umbral_cv_bajo=umbral_cv_bajo,
-            umbral_cv_medio=umbral_cv_medio,
-        ),
-        axis=1,
+    df["estabilidad_turno_cat"] = _clasificar_estabilidad_global(
+        cv,
+        df["osc_turno_cat"].to_numpy(),
+        umbral_cv_bajo=umbral_cv_bajo,
+        umbral_cv_medio=umbral_cv_medio,
     )
 
     return df
@@ -5,32 +5,29 @@ import numpy as np
 
 
 def _clasificar_estado_global_rango(
-    pct_en_rango: float,
+    pct_en_rango: np.ndarray,
     umbral_ok: float,
     umbral_leve: float,
     umbral_moderada: float,
-) -> str:
+) -> np.ndarray:
     """
-    Clasifica el estado global del turno según % en rango.
+    Clasifica el estado global de cada turno según % en rango.
     """
-    if pd.isna(pct_en_rango):
-        return "desconocido"
-
-    if pct_en_rango >= umbral_ok:
-        return "OK"
-    elif pct_en_rango >= umbral_leve:
-        return "Leve desviación"
-    elif pct_en_rango >= umbral_moderada:
-        return "Desviación moderada"
-    else:
-        return "Crítica"
+    condiciones = [
+        np.isnan(pct_en_rango),
+        pct_en_rango >= umbral_ok,
+        pct_en_rango >= umbral_leve,
+        pct_en_rango >= umbral_moderada,
+    ]
+    categorias = ["desconocido", "OK", "Leve desviación", "Desviación moderada"]
+    return np.select(condiciones, categorias, default="Crítica")
 
 
 def _clasificar_desviacion_predominante(
-    pct_bajo: float,
-    pct_alto: float,
+    pct_bajo: np.ndarray,
+    pct_alto: np.ndarray,
     umbral_predominio: float,
-) -> str:
+) -> np.ndarray:
     """
     Determina si la desviación predominante es:
         - por_debajo
@@ -39,76 +36,52 @@ def _clasificar_desviacion_predominante(
         - sin_desviacion
     según % de tiempo por debajo y por encima del rango.
     """
-    if pd.isna(pct_bajo) or pd.isna(pct_alto):
-        return "desconocida"
-
     total_fuera = pct_bajo + pct_alto
+    hay_desviacion = total_fuera >= 1e-6
 
-    if total_fuera < 1e-6:
-        return "sin_desviacion"
+    # porcentaje relativo de cada lado (solo donde hay algo fuera de rango)
+    frac_bajo = np.divide(pct_bajo, total_fuera, out=np.zeros_like(total_fuera), where=hay_desviacion)
+    frac_alto = np.divide(pct_alto, total_fuera, out=np.zeros_like(total_fuera), where=hay_desviacion)
 
-    # porcentaje relativo de cada lado
-    frac_bajo = pct_bajo / total_fuera
-    frac_alto = pct_alto / total_fuera
-
-    if frac_bajo >= umbral_predominio and frac_alto < (1 - umbral_predominio):
-        return "por_debajo"
-    elif frac_alto >= umbral_predominio and frac_bajo < (1 - umbral_predominio):
-        return "por_encima"
-    else:
-        return "mixta"
+    condiciones = [
+        np.isnan(pct_bajo) | np.isnan(pct_alto),
+        ~hay_desviacion,
+        (frac_bajo >= umbral_predominio) & (frac_alto < (1 - umbral_predominio)),
+        (frac_alto >= umbral_predominio) & (frac_bajo < (1 - umbral_predominio)),
+    ]
+    categorias = ["desconocida", "sin_desviacion", "por_debajo", "por_encima"]
+    return np.select(condiciones, categorias, default="mixta")
 
 
 def _clasificar_prioridad_atencion(
-    estado_global: str,
-    gap_pct: float | None,
+    estado_global: np.ndarray,
+    gap_pct: np.ndarray,
     umbral_gap_medio: float,
     umbral_gap_alto: float,
-) -> str:
+) -> np.ndarray:
     """
     Clasifica prioridad de atención combinando:
         - estado_global_rango
         - gap_pct (desviación relativa frente al mes)
     """
-    if estado_global == "desconocido":
-        return "Desconocida"
-
-    # base según estado_global
-    if estado_global == "OK":
-        base = "Baja"
-    elif estado_global == "Leve desviación":
-        base = "Media"
-    elif estado_global == "Desviación moderada":
-        base = "Alta"
-    else:  # Crítica
-        base = "Crítica"
-
-    # Ajuste según gap_pct
-    if gap_pct is None or pd.isna(gap_pct):
-        return base
-
-    gap_abs = abs(gap_pct)
-
-    if gap_abs >= umbral_gap_alto:
-        # subimos un nivel de prioridad si no está ya en Crítica
-        if base == "Baja":
-            return "Media"
-        elif base == "Media":
-            return "Alta"
-        elif base == "Alta":
-            return "Crítica"
-        else:
-            return base
-    elif gap_abs >= umbral_gap_medio:
-        # subimos medio escalón: de Baja→Media o de Media→Alta
-        if base == "Baja":
-            return "Media"
-        elif base == "Media":
-            return "Alta"
-        else:
-            return base
-    else:
-        return base
+    niveles = np.array(["Baja", "Media", "Alta", "Crítica"])
+
+    # nivel base según estado_global (Crítica por defecto)
+    nivel = np.select(
+        [estado_global == "OK", estado_global == "Leve desviación", estado_global == "Desviación moderada"],
+        [0, 1, 2],
+        default=3,
+    )
+
+    # Ajuste según gap_pct (si es NaN no se ajusta):
+    #   - gap alto: subimos un nivel si no está ya en Crítica
+    #   - gap medio: subimos medio escalón, solo de Baja→Media o de Media→Alta
+    gap_abs = np.abs(gap_pct)
+    sube_alto = gap_abs >= umbral_gap_alto
+    sube_medio = ~sube_alto & (gap_abs >= umbral_gap_medio)
+    nivel = nivel + (sube_alto & (nivel < 3)) + (sube_medio & (nivel < 2))
+
+    return np.where(estado_global == "desconocido", "Desconocida", niveles[nivel])
 
 
 def clasificar_rangos_turno(
@@ -143,35 +116,30 @@ def clasificar_rangos_turno(
     """
     df = df_features.copy()
 
+    pct_bajo = df[col_pct_bajo].to_numpy(dtype=float)
+    pct_alto = df[col_pct_alto].to_numpy(dtype=float)
+
     # 1) Estado global según % en rango
-    df["estado_global_rango"] = df[col_pct_en_rango].apply(
-        lambda x: _clasificar_estado_global_rango(
-            x,
-            umbral_ok=umbral_ok,
-            umbral_leve=umbral_leve,
-            umbral_moderada=umbral_moderada,
-        )
+    df["estado_global_rango"] = _clasificar_estado_global_rango(
+        df[col_pct_en_rango].to_numpy(dtype=float),
+        umbral_ok=umbral_ok,
+        umbral_leve=umbral_leve,
+        umbral_moderada=umbral_moderada,
     )
 
     # 2) Desviación predominante según % bajo / % alto
-    df["desviacion_predominante"] = df.apply(
-        lambda row: _clasificar_desviacion_predominante(
-            row[col_pct_bajo],
-            row[col_pct_alto],
-            umbral_predominio=umbral_predominio,
-        ),
-        axis=1,
+    df["desviacion_predominante"] = _clasificar_desviacion_predominante(
+        pct_bajo,
+        pct_alto,
+        umbral_predominio=umbral_predominio,
     )
 
     # 3) Prioridad de atención combinando estado_global_rango + gap_pct
-    df["prioridad_atencion"] = df.apply(
-        lambda row: _clasificar_prioridad_atencion(
-            estado_global=row["estado_global_rango"],
-            gap_pct=row[col_gap_pct],
-            umbral_gap_medio=umbral_gap_medio,
-            umbral_gap_alto=umbral_gap_alto,
-        ),
-        axis=1,
+    df["prioridad_atencion"] = _clasificar_prioridad_atencion(
+        df["estado_global_rango"].to_numpy(),
+        df[col_gap_pct].to_numpy(dtype=float),
+        umbral_gap_medio=umbral_gap_medio,
+        umbral_gap_alto=umbral_gap_alto,
     )
 
     return df
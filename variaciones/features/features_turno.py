@@ -20,6 +20,15 @@ def asignar_turno(ts: pd.Timestamp) -> str:
         return "T3_16_00"
 
 
+def asignar_turno_serie(ts: pd.Series) -> pd.Series:
+    """
+    Versión vectorizada de asignar_turno para una serie de timestamps.
+    """
+    h = ts.dt.hour
+    turnos = np.select([h < 8, h < 16], ["T1_00_08", "T2_08_16"], default="T3_16_00")
+    return pd.Series(turnos, index=ts.index)
+
+
 # =========================
 # 2. Enriquecer df_long con columnas de fecha y turno
 # =========================
@@ -29,20 +38,32 @@ def agregar_info_turno(df_long: pd.DataFrame) -> pd.DataFrame:
         - 'Tag de PI'
         - 'timestamp'
         - 'value'
-    y añade:
+    y añade (si no están ya):
         - 'turno'
         - 'fecha' (solo la fecha, sin hora)
+
+    Si ya tiene ambas columnas y timestamp es datetime, devuelve el mismo
+    dataframe sin copiarlo.
     """
+    # Si ya está todo no hace falta copiar el dataframe: se devuelve el mismo
+    if (
+        {"turno", "fecha"}.issubset(df_long.columns)
+        and pd.api.types.is_datetime64_any_dtype(df_long["timestamp"])
+    ):
+        return df_long
+
     df = df_long.copy()
 
     # Asegurarnos de que timestamp es datetime
     df["timestamp"] = pd.to_datetime(df["timestamp"])
 
     # Asignar turno
-    df["turno"] = df["timestamp"].apply(asignar_turno)
+    if "turno" not in df.columns:
+        df["turno"] = asignar_turno_serie(df["timestamp"])
 
     # Fecha del día (sin tiempo)
-    df["fecha"] = df["timestamp"].dt.date
+    if "fecha" not in df.columns:
+        df["fecha"] = df["timestamp"].dt.date
 
     return df
 
@@ -63,21 +84,23 @@ def calcular_stats_por_turno(df_long_con_turno: pd.DataFrame) -> pd.DataFrame:
     if not cols_necesarias.issubset(df_long_con_turno.columns):
         raise ValueError(f"Faltan columnas necesarias en df_long: {cols_necesarias}")
 
-    df_turno_stats = (
-        df_long_con_turno
-        .groupby(["Tag de PI", "fecha", "turno"])["value"]
-        .agg(
-            mean_turno="mean",
-            std_turno="std",
-            min_turno="min",
-            max_turno="max",
-            p10_turno=lambda x: x.quantile(0.10),
-            p50_turno="median",
-            p90_turno=lambda x: x.quantile(0.90),
-        )
-        .reset_index()
+    grupos = df_long_con_turno.groupby(["Tag de PI", "fecha", "turno"], observed=True)["value"]
+
+    df_turno_stats = grupos.agg(
+        mean_turno="mean",
+        std_turno="std",
+        min_turno="min",
+        max_turno="max",
     )
 
+    # Percentiles con el quantile agrupado de pandas (una pasada para todos los
+    # grupos) en lugar de una lambda Python por grupo
+    df_turno_stats["p10_turno"] = grupos.quantile(0.10)
+    df_turno_stats["p50_turno"] = grupos.median()
+    df_turno_stats["p90_turno"] = grupos.quantile(0.90)
+
+    df_turno_stats = df_turno_stats.reset_index()
+
     return df_turno_stats
 
 
@@ -94,7 +117,7 @@ def calcular_stats_mensuales(df_long: pd.DataFrame) -> pd.DataFrame:
 
     df_month_stats = (
         df_long
-        .groupby("Tag de PI")["value"]
+        .groupby("Tag de PI", observed=True)["value"]
         .agg(mean_mes="mean")
         .reset_index()
     )
@@ -3,7 +3,7 @@
 import pandas as pd
 
 from preprocesamiento import preprocesar_datos_proceso
-from features_turno import construir_features_turno
+from features_turno import agregar_info_turno, construir_features_turno
 from rangos import (
     construir_rangos_desde_historico,
     calcular_porcentajes_rango_por_turno,
@@ -17,6 +17,25 @@ from features.clasificar_dinamica_turno import clasificar_dinamica_turno
 from features.clasificar_rangos_turno import clasificar_rangos_turno
 
 
+def guardar_csv(df: pd.DataFrame, ruta: str) -> None:
+    """
+    Guarda df en CSV (sin índice). Usa el escritor de pyarrow, bastante más
+    rápido que DataFrame.to_csv; si pyarrow no está instalado, o no puede
+    convertir el dataframe (ej. tags con tipos mezclados), usa pandas.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        df.to_csv(ruta, index=False)
+        return
+
+    try:
+        pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), ruta)
+    except pa.ArrowException:
+        df.to_csv(ruta, index=False)
+
+
 def main():
     ruta = r"datos\Datos de proceso N-101.xlsx"
 
@@ -28,6 +47,10 @@ def main():
         verbose=True,
     )
 
+    # Turno y fecha se calculan una sola vez: los módulos de features, rangos
+    # y dinámica reutilizan estas columnas en lugar de recalcularlas
+    df_long = agregar_info_turno(df_long)
+
     # 2) Features de turno (estadísticas + comparación mensual)
     df_features_turno = construir_features_turno(df_long)
 
@@ -102,7 +125,7 @@ def main():
         ].head()
     )
 
-    df_features_final.to_csv("features_turno_llm_ready.csv", index=False)
+    guardar_csv(df_features_final, "features_turno_llm_ready.csv")
 
 
 if __name__ == "__main__":
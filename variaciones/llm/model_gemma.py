@@ -29,6 +29,8 @@ class GemmaClient:
         # Configurar padding token si no existe (necesario para Qwen)
         if self.tokenizer.pad_token is None:
             self.tokenizer.pad_token = self.tokenizer.eos_token
+        # Padding a la izquierda para poder generar en lotes (modelo decoder-only)
+        self.tokenizer.padding_side = "left"
         
         # Configurar dtype
         dtype = torch.float16 if self.device == "cuda" else torch.float32
@@ -72,6 +74,31 @@ class GemmaClient:
             tokenizer=self.tokenizer,
         )
 
+    def _formatear_prompt(self, prompt: str) -> str:
+        """
+        Si el tokenizer tiene chat_template (Qwen 2.5), formatea el prompt como
+        mensaje de usuario; si no, lo devuelve tal cual.
+        """
+        if hasattr(self.tokenizer, 'apply_chat_template') and self.tokenizer.chat_template:
+            messages = [{"role": "user", "content": prompt}]
+            return self.tokenizer.apply_chat_template(
+                messages,
+                tokenize=False,
+                add_generation_prompt=True
+            )
+        return prompt
+
+    @staticmethod
+    def _limpiar_salida(out: str, prompt: str, formatted_prompt: str) -> str:
+        """
+        Quita de la salida el prompt (formateado o no) si el modelo lo repite.
+        """
+        if out.startswith(formatted_prompt):
+            return out[len(formatted_prompt):].strip()
+        elif out.startswith(prompt):
+            return out[len(prompt):].strip()
+        return out
+
     def generate(self, prompt: str, **gen_kwargs) -> str:
         """
         Genera texto para un prompt dado.
@@ -80,27 +107,30 @@ class GemmaClient:
         kwargs = GENERATION_CONFIG.copy()
         kwargs.update(gen_kwargs)
 
-        # Si el tokenizer tiene chat_template, usarlo para formatear el prompt
-        if hasattr(self.tokenizer, 'apply_chat_template') and self.tokenizer.chat_template:
-            # Formatear como mensaje de usuario para Qwen
-            messages = [{"role": "user", "content": prompt}]
-            formatted_prompt = self.tokenizer.apply_chat_template(
-                messages, 
-                tokenize=False, 
-                add_generation_prompt=True
-            )
-        else:
-            formatted_prompt = prompt
+        formatted_prompt = self._formatear_prompt(prompt)
 
         out = self.pipe(
             formatted_prompt,
             **kwargs
         )[0]["generated_text"]
 
-        # Limpiar el prompt de la salida
-        if out.startswith(formatted_prompt):
-            out = out[len(formatted_prompt):].strip()
-        elif out.startswith(prompt):
-            out = out[len(prompt):].strip()
+        return self._limpiar_salida(out, prompt, formatted_prompt)
 
-        return out
+    def generate_batch(self, prompts: list[str], batch_size: int = 8, **gen_kwargs) -> list[str]:
+        """
+        Genera texto para varios prompts, pasándolos al pipeline en lotes de
+        batch_size. Aprovecha mucho mejor la GPU que llamar a generate() uno a uno.
+        """
+        if not prompts:
+            return []
+
+        kwargs = GENERATION_CONFIG.copy()
+        kwargs.update(gen_kwargs)
+
+        formatted_prompts = [self._formatear_prompt(p) for p in prompts]
+        salidas = self.pipe(formatted_prompts, batch_size=batch_size, **kwargs)
+
+        return [
+            self._limpiar_salida(salida[0]["generated_text"], prompt, formatted_prompt)
+            for prompt, formatted_prompt, salida in zip(prompts, formatted_prompts, salidas)
+        ]